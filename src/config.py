@@ -3,6 +3,7 @@ Configuration file for cross-platform compatibility
 """
 import os
 import platform
+import shutil
 import subprocess
 from pathlib import Path
 
@@ -74,14 +75,11 @@ class Config:
                 "colmap.exe"  # If in PATH
             ]
         
-        # Check if COLMAP is in PATH
-        try:
-            result = subprocess.run(["which", "colmap"] if not self.is_windows else ["where", "colmap"], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                possible_paths.append(result.stdout.strip())
-        except:
-            pass
+        # Check if COLMAP is in PATH (resolved in-process, PATHEXT included on Windows,
+        # instead of spawning which/where)
+        path_colmap = shutil.which("colmap")
+        if path_colmap:
+            possible_paths.append(path_colmap)
         
         # Try each possible path
         for path in possible_paths:
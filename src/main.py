@@ -44,8 +44,22 @@ args = parse_arguments()
 
 # Use basic COLMAP parameters
 config.colmap_params = {
-    'gpu_index': 0,              # GPU device index to use
-    'use_gpu': True              # Enable GPU acceleration
+    'gpu_index': 0,                     # GPU device index to use
+    'use_gpu': True,                    # Enable GPU acceleration
+    'ordered_images': False,            # True for video frames: sequential matching only
+    'vocab_tree_path': None,            # COLMAP vocabulary tree file, used above 300 images
+    'knn_matching': False,              # Match thumbnail nearest neighbors instead of sequential+transitive
+    'max_image_size': 3200,             # Downscale larger images before SIFT extraction
+    'max_num_features': 8192,           # Max SIFT features per image
+    'max_num_matches': 32768,           # Max matches per image pair
+    'ba_global_images_freq': 500,       # Global BA after this many new images
+    'ba_global_max_num_iterations': 20, # Iterations per global BA
+    'ba_global_max_refinements': 2,     # Global BA refinement rounds
+    'ba_local_num_images': 6,           # Images in each local BA window
+    'emit_txt': False,                  # Also export the sparse model as TXT
+    'use_glomap_init': False,           # Refine an existing (e.g. GLOMAP) sparse/0 with one BA pass
+    'leaf_max_num_images': 500,         # Max images per hierarchical mapping cluster
+    'mapper_workers': -1                # Clusters mapped in parallel (-1 = one per CPU core)
 }
 
 # Update timestamps config
@@ -1,13 +1,16 @@
 """
-Custom 3D Mesh Analysis Pipeline
+Custom 3D Mesh Analysis Pipeline (compatibility alias for pipeline.mesh_analysis)
 """
-from .alignment import run_icp_alignment
-from .comparison import run_c2c_comparison, run_c2m_comparison
-from .measurement import run_mesh_measurement
+from ..mesh_analysis import (
+    run_icp_alignment,
+    run_c2c_comparison,
+    run_c2m_comparison,
+    run_mesh_measurement
+)
 
 __all__ = [
     'run_icp_alignment',
     'run_c2c_comparison', 
     'run_c2m_comparison',
     'run_mesh_measurement'
-] 
\ No newline at end of file
+] 
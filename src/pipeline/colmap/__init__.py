@@ -2,8 +2,8 @@
 COLMAP Pipeline Module
 """
 from .feature_extraction import feature_extraction
-from .matching import sequential_matching, transitive_matching
-from .reconstruction import mapping, model_conversion, image_undistortion
+from .matching import sequential_matching, transitive_matching, knn_matching, vocab_tree_matching, feature_matching
+from .reconstruction import mapping, model_conversion, image_undistortion, convert_and_undistort
 from .dense_reconstruction import check_cuda_availability, run_colmap_pipeline_with_dense
 from .mesh_creation import run_colmap_pipeline
 
@@ -11,9 +11,13 @@ __all__ = [
     'feature_extraction',
     'sequential_matching',
     'transitive_matching', 
+    'knn_matching',
+    'vocab_tree_matching',
+    'feature_matching',
     'mapping',
     'model_conversion',
     'image_undistortion',
+    'convert_and_undistort',
     'check_cuda_availability',
     'run_colmap_pipeline_with_dense',
     'run_colmap_pipeline'
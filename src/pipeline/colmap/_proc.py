@@ -0,0 +1,68 @@
+"""
+COLMAP Shared Helpers
+"""
+import os
+import shutil
+import collections
+import subprocess
+import sys
+
+# Environment for COLMAP child processes, built once instead of copied per command
+# (headless Qt, lazy CUDA module loading)
+_CHILD_ENV = {
+    **os.environ,
+    'QT_QPA_PLATFORM': 'offscreen',
+    'DISPLAY': ':0',
+    'CUDA_MODULE_LOADING': 'LAZY'
+}
+
+# Supported image file extensions, checked with one set lookup per file name
+_IMG_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+
+def _is_image(name):
+    """Check whether a file name has a supported image extension"""
+    return os.path.splitext(name)[1].lower() in _IMG_EXTS
+
+def run_cmd(cmd, cwd=None, log_path=None, env=None, cpus=None, on_error='exit'):
+    """Run a command, streaming its output to a log file, and handle errors"""
+    # on_error: 'exit' ends the pipeline, 'raise' raises RuntimeError, 'return' hands
+    # the failed process back to the caller
+    print(f"[COLMAP] Running: {' '.join(cmd)}")
+    # An absolute executable path and close_fds=False let subprocess use posix_spawn
+    # instead of fork+exec, avoiding a page-table copy of this (large) process
+    cmd = [shutil.which(cmd[0]) or cmd[0], *cmd[1:]]
+    
+    # Stream the output instead of buffering and decoding all of it: only the last
+    # lines are kept for the error report, the rest goes straight to the log file
+    tail = collections.deque(maxlen=256)
+    log_file = open(log_path, 'ab') if log_path else None
+    try:
+        with subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              env=env, close_fds=False) as proc:
+            # Pinned after spawn (a preexec_fn would force the slow fork+exec path);
+            # the worker threads are created later and inherit the mask
+            if cpus:
+                try:
+                    os.sched_setaffinity(proc.pid, cpus)
+                except (AttributeError, OSError):
+                    pass
+            for line in proc.stdout:
+                tail.append(line)
+                if log_file:
+                    log_file.write(line)
+    finally:
+        if log_file:
+            log_file.close()
+    
+    if proc.returncode != 0:
+        output = b''.join(tail).decode(errors='replace')
+        print(f"[COLMAP][ERROR] Command failed: {' '.join(cmd)}\n{output}")
+        if log_path:
+            print(f"[COLMAP][ERROR] Full log: {log_path}")
+        if on_error == 'raise':
+            raise RuntimeError(f"COLMAP command failed with return code {proc.returncode}")
+        if on_error == 'exit':
+            sys.exit(proc.returncode)
+        return proc
+    print(f"[COLMAP] Command completed successfully")
+    return proc
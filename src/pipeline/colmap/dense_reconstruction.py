@@ -5,27 +5,9 @@ import os
 import subprocess
 import sys
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from config import config
-
-def run_cmd(cmd, cwd=None):
-    """Run a command and handle errors"""
-    print(f"[COLMAP] Running: {' '.join(cmd)}")
-    
-    # Set environment variables to force headless mode for Qt applications
-    env = os.environ.copy()
-    env['QT_QPA_PLATFORM'] = 'offscreen'
-    env['DISPLAY'] = ':0'
-    
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, env=env)
-    if result.returncode != 0:
-        print(f"[COLMAP][ERROR] Command failed: {' '.join(cmd)}")
-        if result.stderr:
-            print(f"[COLMAP][ERROR] Error output: {result.stderr}")
-        if result.stdout:
-            print(f"[COLMAP][ERROR] Standard output: {result.stdout}")
-        sys.exit(result.returncode)
-    print(f"[COLMAP] Command completed successfully")
-    return result
+from ._proc import _CHILD_ENV, run_cmd
 
 def check_cuda_availability():
     """Check if CUDA is available for dense reconstruction"""
@@ -80,6 +62,38 @@ def setup_display_environment():
     
     print(f"[COLMAP] Display environment setup complete")
 
+def _undistort_and_stereo_in_process(images_folder, sparse_folder, dense_folder):
+    """Run image undistortion and patch match stereo inside this process via pycolmap"""
+    from .reconstruction import _get_pycolmap, _first_reconstruction
+    pycolmap = _get_pycolmap()
+    
+    # Patch match stereo needs a CUDA-enabled pycolmap build
+    if pycolmap is None or not getattr(pycolmap, 'has_cuda', False):
+        return False
+    
+    model_folder = _first_reconstruction(sparse_folder)
+    if model_folder is None:
+        return False
+    
+    print(f"[COLMAP] Running undistortion and dense stereo in-process (pycolmap)")
+    # Fall back to the COLMAP subprocesses only on an API mismatch with the
+    # installed pycolmap; data errors would fail there too and are left to propagate
+    try:
+        pycolmap.undistort_images(
+            output_path=dense_folder,
+            input_path=model_folder,
+            image_path=images_folder
+        )
+        print(f"[COLMAP] Image undistortion completed")
+        
+        options = pycolmap.PatchMatchOptions()
+        options.gpu_index = "0"
+        pycolmap.patch_match_stereo(dense_folder, workspace_format="COLMAP", options=options)
+    except (AttributeError, TypeError) as e:
+        print(f"[COLMAP][WARNING] pycolmap API mismatch ({e}), using COLMAP subprocesses instead")
+        return False
+    return True
+
 def run_colmap_pipeline_with_dense(images_folder, output_folder):
     """Run COLMAP pipeline including dense reconstruction if CUDA is available"""
     
@@ -114,16 +128,14 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
     
     # Import sparse reconstruction functions
     from .feature_extraction import feature_extraction
-    from .matching import sequential_matching, transitive_matching
+    from .matching import feature_matching
     from .reconstruction import mapping, model_conversion, image_undistortion
-    from .mesh_creation import run_colmap_pipeline
     
     # Standard COLMAP pipeline
     try:
         feature_extraction(database_path, images_folder)
-        sequential_matching(database_path)
-        transitive_matching(database_path)
-        mapping(database_path, images_folder, sparse_folder)
+        feature_matching(database_path, images_folder)
+        reconstruction = mapping(database_path, images_folder, sparse_folder)
     except Exception as e:
         print(f"[COLMAP][ERROR] Pipeline failed: {e}")
         print(f"[COLMAP] Attempting to diagnose the issue...")
@@ -149,8 +161,6 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
         
         # Re-raise the exception if we can't handle it
         raise
-    model_conversion(sparse_folder)
-    image_undistortion(images_folder, sparse_folder, dense_folder)
     
     # Dense reconstruction (CUDA is available)
     print(f"[COLMAP] Starting dense stereo reconstruction")
@@ -160,15 +170,26 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     
-    # Build command with basic options
-    cmd = [
-        colmap_cmd, "patch_match_stereo",
-        "--workspace_path", dense_folder,
-        "--workspace_format", "COLMAP",
-        "--PatchMatchStereo.gpu_index", "0"
-    ]
-    
-    run_cmd(cmd)
+    # The optional TXT export only reads the sparse model, so it runs in the
+    # background for the whole dense stage instead of before or after it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        conversion = executor.submit(model_conversion, sparse_folder, reconstruction)
+        
+        # Undistortion and stereo share one process and CUDA context when pycolmap is
+        # available; otherwise each stage runs as its own COLMAP subprocess
+        if not _undistort_and_stereo_in_process(images_folder, sparse_folder, dense_folder):
+            image_undistortion(images_folder, sparse_folder, dense_folder, reconstruction)
+            
+            # Build command with basic options
+            cmd = [
+                colmap_cmd, "patch_match_stereo",
+                "--workspace_path", dense_folder,
+                "--workspace_format", "COLMAP",
+                "--PatchMatchStereo.gpu_index", "0"
+            ]
+            
+            run_cmd(cmd, log_path=os.path.join(dense_folder, "patch_match_stereo.log"), env=_CHILD_ENV)
+        conversion.result()
     print(f"[COLMAP] Dense stereo reconstruction completed")
     
     # Dense fusion
@@ -183,7 +204,7 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
         "--input_type", "geometric",
         "--output_path", os.path.join(fused_folder, "fused.ply"),
         "--StereoFusion.gpu_index", "0"
-    ])
+    ], log_path=os.path.join(dense_folder, "stereo_fusion.log"), env=_CHILD_ENV)
     
     print(f"[COLMAP] Stereo fusion completed")
     
@@ -197,7 +218,7 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
         "--input_path", os.path.join(fused_folder, "fused.ply"),
         "--output_path", os.path.join(mesh_folder, "mesh.ply"),
         "--PoissonMeshing.gpu_index", "0"
-    ])
+    ], log_path=os.path.join(mesh_folder, "poisson_mesher.log"), env=_CHILD_ENV)
     
     print(f"[COLMAP] Mesh creation completed")
     
@@ -208,7 +229,7 @@ def run_colmap_pipeline_with_dense(images_folder, output_folder):
         "--input_path", os.path.join(mesh_folder, "mesh.ply"),
         "--output_path", obj_file,
         "--output_type", "OBJ"
-    ])
+    ], log_path=os.path.join(mesh_folder, "model_converter.log"), env=_CHILD_ENV)
     print(f"[COLMAP] Model conversion completed")
     
     print(f"[COLMAP] Pipeline complete: {obj_file}")
@@ -2,20 +2,57 @@
 COLMAP Feature Extraction Module
 """
 import os
-import subprocess
 import sys
 from config import config
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from ._proc import _IMG_EXTS, _is_image, run_cmd
 
-def run_cmd(cmd, cwd=None):
-    """Run a command and handle errors"""
-    print(f"[COLMAP] Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"[COLMAP][ERROR] Command failed: {' '.join(cmd)}\n{result.stderr}")
-        sys.exit(result.returncode)
-    print(f"[COLMAP] Command completed successfully")
-    return result
+def _extract_in_process(database_path, images_folder, colmap_params):
+    """Extract SIFT features inside this process via pycolmap (False if unavailable)"""
+    from .reconstruction import _get_pycolmap
+    pycolmap = _get_pycolmap()
+    if pycolmap is None:
+        return False
+    
+    use_gpu = colmap_params.get('use_gpu', True)
+    # A CPU-only pycolmap (the default wheel) must not replace GPU SIFT in the CLI
+    if use_gpu and not getattr(pycolmap, 'has_cuda', False):
+        return False
+    print(f"[COLMAP] Running feature extraction in-process (pycolmap)")
+    # Only an API mismatch with the installed pycolmap falls back to the CLI
+    try:
+        if hasattr(pycolmap, 'FeatureExtractionOptions'):
+            options = pycolmap.FeatureExtractionOptions()
+            options.max_image_size = colmap_params.get('max_image_size', 3200)
+            options.sift.max_num_features = colmap_params.get('max_num_features', 8192)
+            options.gpu_index = str(colmap_params.get('gpu_index', 0))
+            kwargs = {'extraction_options': options}
+        else:
+            options = pycolmap.SiftExtractionOptions()
+            options.max_image_size = colmap_params.get('max_image_size', 3200)
+            options.max_num_features = colmap_params.get('max_num_features', 8192)
+            options.gpu_index = str(colmap_params.get('gpu_index', 0))
+            kwargs = {'sift_options': options}
+        pycolmap.extract_features(
+            database_path, images_folder,
+            device=pycolmap.Device.cuda if use_gpu else pycolmap.Device.cpu,
+            **kwargs
+        )
+    except (AttributeError, TypeError) as e:
+        print(f"[COLMAP][WARNING] pycolmap API mismatch ({e}), using the COLMAP feature extractor instead")
+        return False
+    return True
+
+def _read_image_size(img_path):
+    """Open an image header and return (size, error)"""
+    try:
+        # Try to open image to check if it's valid
+        from PIL import Image
+        with Image.open(img_path) as img:
+            return img.size, None
+    except Exception as e:
+        return None, e
 
 def feature_extraction(database_path, images_folder):
     """Extract features from images using COLMAP with aggressive speed optimization"""
@@ -27,13 +64,13 @@ def feature_extraction(database_path, images_folder):
         sys.exit(1)
     
     # Count images in folder
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
-    image_files = [f for f in os.listdir(images_folder) 
-                   if any(f.lower().endswith(ext) for ext in image_extensions)]
+    with os.scandir(images_folder) as entries:
+        image_files = [e.name for e in entries
+                       if e.is_file() and _is_image(e.name)]
     
     if not image_files:
         print(f"[COLMAP][ERROR] No image files found in {images_folder}")
-        print(f"[COLMAP][ERROR] Supported formats: {', '.join(image_extensions)}")
+        print(f"[COLMAP][ERROR] Supported formats: {', '.join(sorted(_IMG_EXTS))}")
         sys.exit(1)
     
     print(f"[COLMAP] Found {len(image_files)} images: {', '.join(image_files[:5])}{'...' if len(image_files) > 5 else ''}")
@@ -41,20 +78,19 @@ def feature_extraction(database_path, images_folder):
     # Validate image files are readable
     print(f"[COLMAP] Validating image files...")
     valid_images = []
-    for img_file in image_files:
-        img_path = os.path.join(images_folder, img_file)
-        try:
-            # Try to open image to check if it's valid
-            from PIL import Image
-            with Image.open(img_path) as img:
-                width, height = img.size
-                if width > 0 and height > 0:
-                    valid_images.append(img_file)
-                    print(f"[COLMAP] ✓ {img_file}: {width}x{height}")
-                else:
-                    print(f"[COLMAP] ✗ {img_file}: Invalid dimensions")
-        except Exception as e:
-            print(f"[COLMAP] ✗ {img_file}: {e}")
+    # Header reads are I/O bound, so check the images on a thread pool
+    image_paths = [os.path.join(images_folder, f) for f in image_files]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        for img_file, (size, error) in zip(image_files, executor.map(_read_image_size, image_paths)):
+            if error is not None:
+                print(f"[COLMAP] ✗ {img_file}: {error}")
+                continue
+            width, height = size
+            if width > 0 and height > 0:
+                valid_images.append(img_file)
+                print(f"[COLMAP] ✓ {img_file}: {width}x{height}")
+            else:
+                print(f"[COLMAP] ✗ {img_file}: Invalid dimensions")
     
     if not valid_images:
         print(f"[COLMAP][ERROR] No valid images found in {images_folder}")
@@ -63,19 +99,26 @@ def feature_extraction(database_path, images_folder):
     
     print(f"[COLMAP] {len(valid_images)}/{len(image_files)} images are valid")
     
+    colmap_params = getattr(config, 'colmap_params', {})
+    
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     
-    # Build command with basic options
+    # Build command with basic options; capping the image size and feature count
+    # bounds SIFT time and database size on high-resolution captures
     cmd = [
         colmap_cmd, "feature_extractor",
         "--database_path", database_path,
         "--image_path", images_folder,
-        "--FeatureExtraction.use_gpu", "1",
-        "--FeatureExtraction.gpu_index", "0"
+        "--FeatureExtraction.use_gpu", "1" if colmap_params.get('use_gpu', True) else "0",
+        "--FeatureExtraction.gpu_index", str(colmap_params.get('gpu_index', 0)),
+        "--FeatureExtraction.max_image_size", str(colmap_params.get('max_image_size', 3200)),
+        "--SiftExtraction.max_num_features", str(colmap_params.get('max_num_features', 8192))
     ]
     
-    run_cmd(cmd)
+    # Extracting in-process avoids spawning COLMAP and re-initializing CUDA for this stage
+    if not _extract_in_process(database_path, images_folder, colmap_params):
+        run_cmd(cmd, log_path=os.path.join(os.path.dirname(database_path), "feature_extractor.log"))
     print(f"[COLMAP] Feature extraction completed")
     
     # Validate that features were actually extracted
@@ -95,24 +138,24 @@ def feature_extraction(database_path, images_folder):
     # Try to get feature count from database
     try:
         import sqlite3
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
+        # One read-only query: a missing keypoints table surfaces as OperationalError
+        conn = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            keypoint_count = conn.execute("SELECT COUNT(*) FROM keypoints").fetchone()[0]
+        except sqlite3.OperationalError:
+            keypoint_count = None
+        finally:
+            conn.close()
         
-        # Check if keypoints table exists and has data
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='keypoints'")
-        if cursor.fetchone():
-            cursor.execute("SELECT COUNT(*) FROM keypoints")
-            keypoint_count = cursor.fetchone()[0]
+        if keypoint_count is None:
+            print(f"[COLMAP][WARNING] Keypoints table not found in database")
+        else:
             print(f"[COLMAP] Extracted {keypoint_count} keypoints from {len(image_files)} images")
             
             if keypoint_count == 0:
                 print(f"[COLMAP][ERROR] No keypoints extracted - images may be corrupted or unsuitable")
                 print(f"[COLMAP][ERROR] Check image quality, format, and content")
                 sys.exit(1)
-        else:
-            print(f"[COLMAP][WARNING] Keypoints table not found in database")
-            
-        conn.close()
     except Exception as e:
         print(f"[COLMAP][WARNING] Could not verify keypoint count: {e}")
         print(f"[COLMAP] Continuing with database size validation only") 
\ No newline at end of file
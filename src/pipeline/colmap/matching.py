@@ -2,36 +2,81 @@
 COLMAP Matching Module
 """
 import os
-import subprocess
-import sys
+import ctypes
+import numpy as np
 from config import config
 import multiprocessing
+from ._proc import _CHILD_ENV, _is_image, run_cmd
 
-def run_cmd(cmd, cwd=None):
-    """Run a command and handle errors"""
-    print(f"[COLMAP] Running: {' '.join(cmd)}")
-    
-    # Set environment variables to force headless mode for Qt applications
-    env = os.environ.copy()
-    env['QT_QPA_PLATFORM'] = 'offscreen'
-    env['DISPLAY'] = ':0'
-    
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, env=env)
-    if result.returncode != 0:
-        print(f"[COLMAP][ERROR] Command failed: {' '.join(cmd)}")
-        if result.stderr:
-            print(f"[COLMAP][ERROR] Error output: {result.stderr}")
-        if result.stdout:
-            print(f"[COLMAP][ERROR] Standard output: {result.stdout}")
-        
-        # Don't exit immediately, let the calling function handle it
-        raise RuntimeError(f"COLMAP command failed with return code {result.returncode}")
-    
-    print(f"[COLMAP] Command completed successfully")
-    return result
+# Above this many images, a configured vocabulary tree replaces thumbnail retrieval
+_VOCAB_TREE_MIN_IMAGES = 300
+
+def _probe_cuda():
+    """Check once whether a CUDA driver with at least one device is present"""
+    for lib_name in ('libcuda.so.1', 'libcuda.so', 'nvcuda.dll', 'libcuda.dylib'):
+        try:
+            libcuda = ctypes.CDLL(lib_name)
+        except OSError:
+            continue
+        device_count = ctypes.c_int(0)
+        return (libcuda.cuInit(0) == 0 and
+                libcuda.cuDeviceGetCount(ctypes.byref(device_count)) == 0 and
+                device_count.value > 0)
+    return False
+
+# Probed at import so GPU-less machines never pay for a failing CUDA init per matcher
+_HAS_CUDA = _probe_cuda()
+_USE_GPU = "1" if _HAS_CUDA else "0"
+
+def _matching_options():
+    """Return the GPU and match-count options shared by all matchers"""
+    colmap_params = getattr(config, 'colmap_params', {})
+    use_gpu = _USE_GPU if colmap_params.get('use_gpu', True) else "0"
+    return [
+        "--FeatureMatching.use_gpu", use_gpu,
+        "--FeatureMatching.gpu_index", str(colmap_params.get('gpu_index', 0)),
+        "--FeatureMatching.max_num_matches", str(colmap_params.get('max_num_matches', 32768))
+    ]
+
+def _sequential_matching_in_process(database_path):
+    """Run sequential matching inside this process via pycolmap (False if unavailable)"""
+    from .reconstruction import _get_pycolmap
+    pycolmap = _get_pycolmap()
+    if pycolmap is None:
+        return False
+    
+    colmap_params = getattr(config, 'colmap_params', {})
+    use_gpu = colmap_params.get('use_gpu', True) and _HAS_CUDA
+    # A CPU-only pycolmap (the default wheel) must not replace GPU matching in the CLI
+    if use_gpu and not getattr(pycolmap, 'has_cuda', False):
+        return False
+    print(f"[COLMAP] Running sequential matching in-process (pycolmap)")
+    # Only an API mismatch with the installed pycolmap falls back to the CLI
+    try:
+        if hasattr(pycolmap, 'FeatureMatchingOptions'):
+            options = pycolmap.FeatureMatchingOptions()
+            kwargs = {'matching_options': options}
+        else:
+            options = pycolmap.SiftMatchingOptions()
+            kwargs = {'sift_options': options}
+        options.max_num_matches = colmap_params.get('max_num_matches', 32768)
+        options.gpu_index = str(colmap_params.get('gpu_index', 0))
+        pycolmap.match_sequential(
+            database_path,
+            device=pycolmap.Device.cuda if use_gpu else pycolmap.Device.cpu,
+            **kwargs
+        )
+    except (AttributeError, TypeError) as e:
+        print(f"[COLMAP][WARNING] pycolmap API mismatch ({e}), using the COLMAP matcher instead")
+        return False
+    return True
 
 def sequential_matching(database_path):
     """Perform sequential matching with basic settings"""
+    if _sequential_matching_in_process(database_path):
+        print(f"[COLMAP] Sequential matching completed")
+        return
+    
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     
@@ -39,11 +84,11 @@ def sequential_matching(database_path):
     cmd = [
         colmap_cmd, "sequential_matcher",
         "--database_path", database_path,
-        "--FeatureMatching.use_gpu", "1",
-        "--FeatureMatching.gpu_index", "0"
+        *_matching_options()
     ]
     
-    run_cmd(cmd)
+    run_cmd(cmd, log_path=os.path.join(os.path.dirname(database_path), "sequential_matcher.log"),
+            env=_CHILD_ENV, on_error='raise')
     print(f"[COLMAP] Sequential matching completed")
 
 def transitive_matching(database_path):
@@ -55,13 +100,128 @@ def transitive_matching(database_path):
     cmd = [
         colmap_cmd, "transitive_matcher",
         "--database_path", database_path,
-        "--FeatureMatching.use_gpu", "1",
-        "--FeatureMatching.gpu_index", "0"
+        *_matching_options()
     ]
     
-    run_cmd(cmd)
+    run_cmd(cmd, log_path=os.path.join(os.path.dirname(database_path), "transitive_matcher.log"),
+            env=_CHILD_ENV, on_error='raise')
     print(f"[COLMAP] Transitive matching completed")
 
+def _image_descriptor(img_path, size=32):
+    """Compute a cheap global descriptor (normalized grayscale thumbnail) for an image"""
+    from PIL import Image
+    try:
+        with Image.open(img_path) as img:
+            # Let the JPEG decoder downscale while decoding instead of decoding full size
+            img.draft('L', (size * 4, size * 4))
+            thumb = img.convert('L').resize((size, size))
+    except (OSError, ValueError) as e:
+        # UnidentifiedImageError and truncated files are OSErrors; skip them like COLMAP does
+        print(f"[COLMAP][WARNING] Skipping unreadable image {os.path.basename(img_path)}: {e}")
+        return None
+    
+    descriptor = np.asarray(thumb, dtype=np.float32).ravel()
+    descriptor -= descriptor.mean()
+    norm = np.linalg.norm(descriptor)
+    return descriptor / norm if norm > 0 else descriptor
+
+def knn_matching(database_path, images_folder, num_neighbors=50, block_size=1024):
+    """Match each image only against its nearest neighbors in global descriptor space"""
+    with os.scandir(images_folder) as entries:
+        image_files = sorted(e.name for e in entries
+                             if e.is_file() and _is_image(e.name))
+    
+    print(f"[COLMAP] Computing global descriptors for {len(image_files)} images")
+    descriptors = [_image_descriptor(os.path.join(images_folder, f)) for f in image_files]
+    image_files = [f for f, d in zip(image_files, descriptors) if d is not None]
+    descriptors = [d for d in descriptors if d is not None]
+    
+    num_neighbors = min(num_neighbors, len(image_files) - 1)
+    if num_neighbors < 1:
+        print(f"[COLMAP][WARNING] Not enough images to match in {images_folder}")
+        return
+    descriptors = np.stack(descriptors)
+    
+    # Cosine similarity in row blocks so memory stays bounded for large datasets
+    pairs = set()
+    for start in range(0, len(image_files), block_size):
+        stop = min(start + block_size, len(image_files))
+        similarity = descriptors[start:stop] @ descriptors.T
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        nearest = np.argpartition(-similarity, num_neighbors - 1, axis=1)[:, :num_neighbors]
+        for i, neighbors in enumerate(nearest, start):
+            for j in neighbors:
+                pairs.add((min(i, j), max(i, j)))
+    
+    pairs_path = os.path.join(os.path.dirname(database_path), "match_pairs.txt")
+    with open(pairs_path, 'w') as f:
+        for i, j in sorted(pairs):
+            f.write(f"{image_files[i]} {image_files[j]}\n")
+    print(f"[COLMAP] Selected {len(pairs)} candidate pairs ({num_neighbors} neighbors per image)")
+    
+    # Use config for COLMAP path
+    colmap_cmd = config.colmap_path or "colmap"
+    
+    # Build command with basic options
+    cmd = [
+        colmap_cmd, "matches_importer",
+        "--database_path", database_path,
+        "--match_list_path", pairs_path,
+        "--match_type", "pairs",
+        *_matching_options()
+    ]
+    
+    run_cmd(cmd, log_path=os.path.join(os.path.dirname(database_path), "matches_importer.log"),
+            env=_CHILD_ENV, on_error='raise')
+    print(f"[COLMAP] Nearest-neighbor matching completed")
+
+def vocab_tree_matching(database_path, vocab_tree_path, num_images=100):
+    """Match each image against its most similar images retrieved with a vocabulary tree"""
+    # Use config for COLMAP path
+    colmap_cmd = config.colmap_path or "colmap"
+    
+    # Build command with basic options
+    cmd = [
+        colmap_cmd, "vocab_tree_matcher",
+        "--database_path", database_path,
+        "--VocabTreeMatching.vocab_tree_path", vocab_tree_path,
+        "--VocabTreeMatching.num_images", str(num_images),
+        *_matching_options()
+    ]
+    
+    run_cmd(cmd, log_path=os.path.join(os.path.dirname(database_path), "vocab_tree_matcher.log"),
+            env=_CHILD_ENV, on_error='raise')
+    print(f"[COLMAP] Vocabulary tree matching completed")
+
+def feature_matching(database_path, images_folder):
+    """Match features with a single pass suited to how the images were captured"""
+    colmap_params = getattr(config, 'colmap_params', {})
+    if colmap_params.get('ordered_images', False):
+        # Video frames / ordered captures only overlap with their neighbors
+        sequential_matching(database_path)
+        return
+    
+    # Large collections retrieve candidates from the SIFT features themselves when a
+    # vocabulary tree is available, which is more robust than thumbnail similarity
+    vocab_tree_path = colmap_params.get('vocab_tree_path')
+    if vocab_tree_path and os.path.isfile(vocab_tree_path):
+        with os.scandir(images_folder) as entries:
+            num_images = sum(1 for e in entries
+                             if e.is_file() and _is_image(e.name))
+        if num_images > _VOCAB_TREE_MIN_IMAGES:
+            vocab_tree_matching(database_path, vocab_tree_path)
+            return
+    elif vocab_tree_path:
+        print(f"[COLMAP][WARNING] Vocabulary tree not found: {vocab_tree_path}")
+    
+    # Thumbnail retrieval is opt-in: it is no substitute for a real global descriptor
+    if colmap_params.get('knn_matching', False):
+        knn_matching(database_path, images_folder)
+        return
+    
+    sequential_matching(database_path)
+    transitive_matching(database_path)
+
 # Legacy function names for backward compatibility
 def robust_sequential_matching(database_path):
     """Alias for sequential matching (using defaults)"""
@@ -2,24 +2,382 @@
 COLMAP Sparse Reconstruction Module
 """
 import os
+import re
+import json
+import hashlib
+import shutil
+import sqlite3
+import struct
+import functools
 import subprocess
 import sys
 import multiprocessing
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from config import config
+from ._proc import run_cmd
 
-def run_cmd(cmd, cwd=None):
-    """Run a command and handle errors"""
-    print(f"[COLMAP] Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"[COLMAP][ERROR] Command failed: {' '.join(cmd)}\n{result.stderr}")
-        sys.exit(result.returncode)
-    print(f"[COLMAP] Command completed successfully")
-    return result
+# hierarchical_mapper's default leaf size: smaller datasets form a single cluster,
+# so the in-process incremental mapper reconstructs them the same way
+_HIERARCHICAL_LEAF_SIZE = 500
+
+# colmap_params entries passed through to the mapper (as Mapper.<name> on the CLI)
+_MAPPER_PARAMS = (
+    'ba_global_images_freq',
+    'ba_global_points_freq',
+    'ba_global_max_num_iterations',
+    'ba_global_max_refinements',
+    'ba_local_num_images'
+)
+
+# Number of parameters per COLMAP camera model id (needed to parse cameras.bin)
+_CAMERA_MODEL_NUM_PARAMS = {0: 3, 1: 4, 2: 4, 3: 5, 4: 8, 5: 8, 6: 12, 7: 5, 8: 4, 9: 5, 10: 12}
+_PINHOLE_MODEL_ID = 1
+
+# Resolved model folder per sparse folder, shared by the conversion/undistortion stages
+_RECON_CACHE = {}
+
+# On-disk cache of the options each COLMAP binary accepts, keyed by binary mtime
+_FLAGS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "3dmap", "colmap_flags.json")
+
+@functools.lru_cache(maxsize=1)
+def _get_pycolmap():
+    """Import pycolmap on first use, returning None when it is not installed"""
+    # Deferred so importing this module does not load COLMAP's shared library
+    try:
+        import pycolmap
+    except ImportError:
+        return None
+    return pycolmap
+
+@functools.lru_cache(maxsize=1)
+def _physical_cpus():
+    """Return one logical CPU per physical core available to this process"""
+    try:
+        available = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        available = list(range(multiprocessing.cpu_count()))
+    
+    # Keep the first hyperthread sibling of every core, so BA threads do not share L1/L2
+    cpus, seen = [], set()
+    for cpu in available:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = f.read().strip()
+        except OSError:
+            return tuple(available)
+        if siblings not in seen:
+            seen.add(siblings)
+            cpus.append(cpu)
+    return tuple(cpus)
+
+@functools.lru_cache(maxsize=8)
+def _supported_flags(colmap_cmd, command):
+    """Return the options a COLMAP command accepts (empty if they could not be probed)"""
+    binary = shutil.which(colmap_cmd) or colmap_cmd
+    try:
+        cache_key = f"{binary}|{command}|{os.stat(binary).st_mtime_ns}"
+    except OSError:
+        cache_key = None
+    
+    # Reuse the result of a previous run against the same binary
+    cache = {}
+    if cache_key:
+        try:
+            with open(_FLAGS_CACHE_PATH, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        if cache_key in cache:
+            return frozenset(cache[cache_key])
+    
+    try:
+        result = subprocess.run([binary, command, "--help"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return frozenset()
+    flags = frozenset(re.findall(r'--[\w.]+', result.stdout + result.stderr))
+    
+    if cache_key and flags:
+        cache[cache_key] = sorted(flags)
+        try:
+            os.makedirs(os.path.dirname(_FLAGS_CACHE_PATH), exist_ok=True)
+            with open(_FLAGS_CACHE_PATH, 'w') as f:
+                json.dump(cache, f)
+        except OSError:
+            pass
+    return flags
+
+@functools.lru_cache(maxsize=4)
+def _gpu_ba_supported(colmap_cmd):
+    """Check whether the COLMAP binary can run bundle adjustment on the GPU"""
+    # Stock builds may accept --Mapper.ba_use_gpu but be compiled without CUDA; this
+    # only detects that case. Whether Ceres was built with CUDA/cuDSS is not visible
+    # from the CLI, so such a build still falls back to CPU BA inside COLMAP
+    supported = "--Mapper.ba_use_gpu" in _supported_flags(colmap_cmd, "hierarchical_mapper")
+    if supported:
+        binary = shutil.which(colmap_cmd) or colmap_cmd
+        try:
+            result = subprocess.run([binary, "-h"], capture_output=True, text=True, timeout=10)
+            supported = "with CUDA" in result.stdout + result.stderr
+        except (OSError, subprocess.TimeoutExpired):
+            supported = False
+    
+    # Warned here so the cached result reports it once per binary, not once per run
+    if not supported:
+        print(f"[COLMAP][WARNING] COLMAP was built without CUDA bundle adjustment, running BA on the CPU")
+        print(f"[COLMAP][WARNING] Build COLMAP (and Ceres with cuDSS) with CUDA for GPU bundle adjustment")
+    return supported
+
+def _database_counts(database_path):
+    """Return (images, images with keypoints, mean keypoints per image) from the database"""
+    # A single read-only query instead of one round-trip per table
+    try:
+        conn = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            return conn.execute(
+                "SELECT (SELECT COUNT(*) FROM images), (SELECT COUNT(*) FROM keypoints), "
+                "(SELECT AVG(rows) FROM keypoints)").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[COLMAP][WARNING] Could not read database statistics: {e}")
+        return None, None, None
+
+def _database_content(database_path):
+    """Summarize the database rows mapping depends on, or None if it cannot be read"""
+    # Extraction and matching rewrite the file (and its mtime) even when they produce
+    # the same features, so mapping is keyed on what the tables hold instead
+    try:
+        conn = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            return list(conn.execute(
+                "SELECT (SELECT COUNT(*) FROM images), "
+                "(SELECT COUNT(*) FROM keypoints), (SELECT TOTAL(rows) FROM keypoints), "
+                "(SELECT COUNT(*) FROM matches), (SELECT TOTAL(rows) FROM matches), "
+                "(SELECT COUNT(*) FROM two_view_geometries), "
+                "(SELECT TOTAL(rows) FROM two_view_geometries)").fetchone())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+def _ba_global_points_freq(num_images, avg_keypoints, target_global_ba_count=5):
+    """Derive the global BA points frequency from the extracted keypoint counts"""
+    # Global BA runs every time the model grows by this many points, so scaling it
+    # with the expected point count keeps the number of global BA rounds constant
+    if not num_images or not avg_keypoints:
+        return None
+    
+    return max(1, int(2 * avg_keypoints * num_images / target_global_ba_count))
+
+def _fadvise_willneed(path):
+    """Ask the kernel to start reading a file into the page cache"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except (AttributeError, OSError):
+        pass
+    finally:
+        os.close(fd)
+
+def _prewarm(database_path, images_folder):
+    """Start readahead of the database and images before the mapper needs them"""
+    # The hints return immediately; the kernel reads while the mapper initializes
+    try:
+        with os.scandir(images_folder) as entries:
+            paths = [e.path for e in entries if e.is_file()]
+    except OSError:
+        paths = []
+    paths.append(database_path)
+    with ThreadPoolExecutor(max_workers=min(32, multiprocessing.cpu_count() * 4)) as executor:
+        list(executor.map(_fadvise_willneed, paths))
+
+def _stage_signature(input_path, params, content=None):
+    """Hash an input's identity (content summary, else mtime and size) with the parameters of a stage"""
+    if content is None:
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            return None
+        content = [stat.st_mtime_ns, stat.st_size]
+    payload = json.dumps([input_path, content, params], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def _stage_done(sentinel_path, signature):
+    """Check whether a stage already completed with the given signature"""
+    if signature is None:
+        return False
+    try:
+        with open(sentinel_path, 'r') as f:
+            return f.read().strip() == signature
+    except OSError:
+        return False
+
+def _mark_stage_done(sentinel_path, signature):
+    """Record a completed stage so a re-run with the same inputs can skip it"""
+    if signature is None:
+        return
+    with open(sentinel_path, 'w') as f:
+        f.write(signature)
+
+def _first_reconstruction(sparse_folder):
+    """Return the path of the lowest-numbered model in the sparse folder, or None"""
+    cached = _RECON_CACHE.get(sparse_folder)
+    if cached and os.path.isdir(cached):
+        return cached
+    
+    # DirEntry.is_dir uses the d_type returned by the directory read, so this does
+    # not stat every entry (the folder also holds the mapper/converter logs)
+    try:
+        with os.scandir(sparse_folder) as entries:
+            models = [e for e in entries if e.name.isdigit() and e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return None
+    if not models:
+        return None
+    model_folder = min(models, key=lambda e: int(e.name)).path
+    _RECON_CACHE[sparse_folder] = model_folder
+    return model_folder
+
+def _build_options(mapper_options):
+    """Build pycolmap incremental pipeline options from the shared mapper options"""
+    pycolmap = _get_pycolmap()
+    if not getattr(pycolmap, 'has_cuda', False):
+        mapper_options = {**mapper_options, 'ba_use_gpu': False}
+    
+    # Apply all options in one call instead of one pybind setter per attribute,
+    # skipping any this pycolmap version does not expose
+    options = pycolmap.IncrementalPipelineOptions()
+    options.mergedict({name: value for name, value in mapper_options.items() if hasattr(options, name)})
+    return options
+
+def _refine_existing_model(model_folder, physical_cpus):
+    """Refine an existing (e.g. GLOMAP) model with a single bundle adjustment pass"""
+    print(f"[COLMAP] Refining existing model with bundle adjustment: {model_folder}")
+    pycolmap = _get_pycolmap()
+    if pycolmap is not None:
+        try:
+            reconstruction = pycolmap.Reconstruction(model_folder)
+            pycolmap.bundle_adjustment(reconstruction, pycolmap.BundleAdjustmentOptions())
+        except (AttributeError, TypeError) as e:
+            print(f"[COLMAP][WARNING] pycolmap API mismatch ({e}), using the COLMAP bundle adjuster instead")
+        else:
+            reconstruction.write(model_folder)
+            print(f"[COLMAP] Bundle adjustment completed")
+            return reconstruction
+    
+    # Use config for COLMAP path
+    colmap_cmd = config.colmap_path or "colmap"
+    run_cmd([
+        colmap_cmd, "bundle_adjuster",
+        "--input_path", model_folder,
+        "--output_path", model_folder
+    ], log_path=os.path.join(os.path.dirname(model_folder), "bundle_adjuster.log"), cpus=physical_cpus)
+    print(f"[COLMAP] Bundle adjustment completed")
+    return None
+
+def _mapping_in_process(database_path, images_folder, sparse_folder, mapper_options, num_images,
+                        leaf_size=_HIERARCHICAL_LEAF_SIZE):
+    """Run incremental mapping inside this process via pycolmap (None if unavailable)"""
+    pycolmap = _get_pycolmap()
+    if pycolmap is None:
+        return None
+    
+    # Larger datasets benefit from the hierarchical mapper's partitioning
+    if num_images is None or num_images > leaf_size:
+        return None
+    
+    use_gpu = getattr(config, 'colmap_params', {}).get('use_gpu', True)
+    # A CPU-only pycolmap (the default wheel) must not replace GPU BA in the CLI mapper
+    if use_gpu and not getattr(pycolmap, 'has_cuda', False):
+        return None
+    print(f"[COLMAP] Running incremental mapping in-process (pycolmap, {num_images} images)")
+    # Only an API mismatch with the installed pycolmap falls back to the CLI mapper;
+    # a failed reconstruction would fail the same way there, so it is terminal
+    try:
+        # Models are written to sparse_folder/<index> exactly like the CLI mapper
+        reconstructions = pycolmap.incremental_mapping(
+            database_path=database_path,
+            image_path=images_folder,
+            output_path=sparse_folder,
+            options=_build_options(mapper_options)
+        )
+    except (AttributeError, TypeError) as e:
+        print(f"[COLMAP][WARNING] pycolmap API mismatch ({e}), using the COLMAP mapper instead")
+        return None
+    except RuntimeError as e:
+        print(f"[COLMAP][ERROR] Incremental mapping failed: {e}")
+        sys.exit(1)
+    
+    if not reconstructions:
+        print(f"[COLMAP][ERROR] Incremental mapping did not produce a reconstruction")
+        sys.exit(1)
+    
+    print(f"[COLMAP] Incremental mapping completed")
+    return reconstructions[min(reconstructions)]
 
 def mapping(database_path, images_folder, sparse_folder):
-    """Perform sparse reconstruction mapping using hierarchical mapper with basic settings"""
+    """Perform sparse reconstruction mapping, returning the reconstruction when run in-process"""
     os.makedirs(sparse_folder, exist_ok=True)
+    
+    # Shared by the in-process and CLI mappers (passed as --Mapper.<name> flags)
+    # Hyperthreads oversubscribe the BA solver, so use one thread per physical core
+    physical_cpus = _physical_cpus()
+    mapper_options = {
+        'num_threads': len(physical_cpus),
+        'ba_use_gpu': True,
+        'ba_gpu_index': "0"
+    }
+    
+    num_images, num_keypoint_images, avg_keypoints = _database_counts(database_path)
+    
+    # Keep the number of global BA rounds independent of the dataset size
+    points_freq = _ba_global_points_freq(num_keypoint_images, avg_keypoints)
+    if points_freq is not None:
+        print(f"[COLMAP] Using global BA points frequency: {points_freq}")
+        mapper_options['ba_global_points_freq'] = points_freq
+    
+    # Bundle adjustment schedule from the configuration (fewer, shorter global BA
+    # rounds); an explicit points frequency overrides the derived one
+    colmap_params = getattr(config, 'colmap_params', {})
+    for name in _MAPPER_PARAMS:
+        if colmap_params.get(name) is not None:
+            mapper_options[name] = colmap_params[name]
+    
+    # Images per hierarchical mapping cluster and number of clusters mapped in parallel
+    leaf_size = colmap_params.get('leaf_max_num_images', _HIERARCHICAL_LEAF_SIZE)
+    num_workers = colmap_params.get('mapper_workers', -1)
+    
+    # Re-runs on an unchanged database reuse the existing model instead of repeating BA
+    sentinel_path = os.path.join(sparse_folder, ".done")
+    signature = _stage_signature(database_path, [images_folder, mapper_options, leaf_size],
+                                 _database_content(database_path))
+    if _stage_done(sentinel_path, signature) and _first_reconstruction(sparse_folder):
+        print(f"[COLMAP] Sparse model is up to date, skipping mapping")
+        return None
+    
+    # A global SfM model (e.g. from GLOMAP) only needs one refinement pass instead
+    # of incremental registration with repeated global BA rounds
+    model_folder = _first_reconstruction(sparse_folder)
+    if (getattr(config, 'colmap_params', {}).get('use_glomap_init', False) and model_folder
+            and os.path.exists(os.path.join(model_folder, "cameras.bin"))):
+        reconstruction = _refine_existing_model(model_folder, physical_cpus)
+        _mark_stage_done(sentinel_path, signature)
+        return reconstruction
+    
+    _prewarm(database_path, images_folder)
+    
+    # Small datasets skip the mapper subprocess and keep the model in memory
+    reconstruction = _mapping_in_process(database_path, images_folder, sparse_folder, mapper_options,
+                                         num_images, leaf_size)
+    if reconstruction is not None:
+        _RECON_CACHE.pop(sparse_folder, None)
+        _mark_stage_done(sentinel_path, signature)
+        return reconstruction
+    
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     
@@ -28,29 +386,277 @@ def mapping(database_path, images_folder, sparse_folder):
         colmap_cmd, "hierarchical_mapper",
         "--database_path", database_path,
         "--image_path", images_folder,
-        "--output_path", sparse_folder,
-        "--Mapper.ba_use_gpu", "1",
-        "--Mapper.ba_gpu_index", "0"
+        "--output_path", sparse_folder
     ]
     
-    run_cmd(cmd)
+    # Request GPU BA explicitly off when the build cannot honour it, so Ceres does
+    # not allocate device buffers only to fall back to the CPU solver
+    if not _gpu_ba_supported(colmap_cmd):
+        mapper_options['ba_use_gpu'] = False
+        del mapper_options['ba_gpu_index']
+    
+    # The hierarchical mapper partitions the scene into clusters of at most leaf_size
+    # images, maps them on num_workers parallel mappers and merges the results
+    flags = {f"--Mapper.{name}": value for name, value in mapper_options.items()}
+    flags["--leaf_max_num_images"] = leaf_size
+    flags["--num_workers"] = num_workers
+    
+    # Only pass options this COLMAP build understands
+    supported = _supported_flags(colmap_cmd, "hierarchical_mapper")
+    for flag, value in flags.items():
+        if supported and flag not in supported:
+            print(f"[COLMAP][WARNING] {flag} is not supported by this COLMAP build, skipping")
+            continue
+        if isinstance(value, bool):
+            value = int(value)
+        cmd += [flag, str(value)]
+    
+    run_cmd(cmd, log_path=os.path.join(sparse_folder, "mapper.log"), cpus=physical_cpus)
+    # The mapper may have written new models, so resolve the folder again next time
+    _RECON_CACHE.pop(sparse_folder, None)
+    _mark_stage_done(sentinel_path, signature)
     print(f"[COLMAP] Hierarchical mapping completed")
+    return None
 
-def model_conversion(sparse_folder):
-    """Convert model to TXT format"""
+def model_conversion(sparse_folder, reconstruction=None):
+    """Convert model to TXT format (opt-in, downstream stages read the binary model)"""
+    # An in-memory reconstruction is written directly, without re-reading sparse/0
+    if reconstruction is not None:
+        if getattr(config, 'colmap_params', {}).get('emit_txt', False):
+            reconstruction.write_text(sparse_folder)
+            print(f"[COLMAP] Model conversion completed")
+        return
+    
+    model_folder = _first_reconstruction(sparse_folder)
+    if model_folder is None:
+        print(f"[COLMAP][ERROR] No reconstruction found in {sparse_folder}")
+        sys.exit(1)
+    
+    if not getattr(config, 'colmap_params', {}).get('emit_txt', False):
+        # Only sanity check the binary model instead of re-serializing it as text
+        for name in ("cameras.bin", "images.bin", "points3D.bin"):
+            model_file = os.path.join(model_folder, name)
+            if not os.path.exists(model_file) or os.path.getsize(model_file) == 0:
+                print(f"[COLMAP][ERROR] Sparse model file missing or empty: {model_file}")
+                sys.exit(1)
+        print(f"[COLMAP] Skipping TXT model export (enable with colmap_params['emit_txt'])")
+        return
+    
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     run_cmd([
         colmap_cmd, "model_converter",
-        "--input_path", os.path.join(sparse_folder, "0"),
+        "--input_path", model_folder,
         "--output_path", sparse_folder,
         "--output_type", "TXT"
-    ])
+    ], log_path=os.path.join(sparse_folder, "model_converter.log"))
     print(f"[COLMAP] Model conversion completed")
 
-def image_undistortion(images_folder, sparse_folder, dense_folder):
+def _read_cameras_bin(path):
+    """Read a COLMAP cameras.bin into {camera_id: (model_id, width, height, params)}"""
+    cameras = {}
+    with open(path, 'rb') as f:
+        num_cameras, = struct.unpack('<Q', f.read(8))
+        for _ in range(num_cameras):
+            camera_id, model_id, width, height = struct.unpack('<iiQQ', f.read(24))
+            num_params = _CAMERA_MODEL_NUM_PARAMS[model_id]
+            params = struct.unpack(f'<{num_params}d', f.read(8 * num_params))
+            cameras[camera_id] = (model_id, width, height, params)
+    return cameras
+
+def _write_cameras_bin(path, cameras):
+    """Write {camera_id: (model_id, width, height, params)} as a COLMAP cameras.bin"""
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<Q', len(cameras)))
+        for camera_id, (model_id, width, height, params) in cameras.items():
+            f.write(struct.pack('<iiQQ', camera_id, model_id, width, height))
+            f.write(struct.pack(f'<{len(params)}d', *params))
+
+def _read_image_cameras_bin(path):
+    """Read the (image name, camera_id) pairs of a COLMAP images.bin"""
+    images = []
+    with open(path, 'rb') as f:
+        num_images, = struct.unpack('<Q', f.read(8))
+        for _ in range(num_images):
+            # image_id, qvec[4], tvec[3], camera_id
+            camera_id, = struct.unpack('<i', f.read(64)[60:])
+            name = bytearray()
+            char = f.read(1)
+            while char not in (b'\0', b''):
+                name += char
+                char = f.read(1)
+            num_points2D, = struct.unpack('<Q', f.read(8))
+            # Skip the (x, y, point3D_id) observations
+            f.seek(24 * num_points2D, os.SEEK_CUR)
+            images.append((name.decode(), camera_id))
+    return images
+
+def _model_from_reconstruction(reconstruction):
+    """Return the cameras and (image name, camera_id) pairs of an in-memory pycolmap model"""
+    cameras = {camera_id: (int(camera.model.value), camera.width, camera.height, tuple(camera.params))
+               for camera_id, camera in reconstruction.cameras.items()}
+    images = [(image.name, image.camera_id) for _, image in sorted(reconstruction.images.items())]
+    return cameras, images
+
+def _opencv_intrinsics(model_id, params):
+    """Convert COLMAP camera parameters to an OpenCV (K, dist) pair, None if unsupported"""
+    if model_id == 0:    # SIMPLE_PINHOLE: f, cx, cy
+        f, cx, cy = params
+        fx, fy, dist = f, f, []
+    elif model_id == 1:  # PINHOLE: fx, fy, cx, cy
+        fx, fy, cx, cy = params
+        dist = []
+    elif model_id == 2:  # SIMPLE_RADIAL: f, cx, cy, k
+        f, cx, cy, k = params
+        fx, fy, dist = f, f, [k, 0, 0, 0]
+    elif model_id == 3:  # RADIAL: f, cx, cy, k1, k2
+        f, cx, cy, k1, k2 = params
+        fx, fy, dist = f, f, [k1, k2, 0, 0]
+    elif model_id == 4:  # OPENCV: fx, fy, cx, cy, k1, k2, p1, p2
+        fx, fy, cx, cy = params[:4]
+        dist = list(params[4:])
+    elif model_id == 6:  # FULL_OPENCV: fx, fy, cx, cy, k1, k2, p1, p2, k3, k4, k5, k6
+        fx, fy, cx, cy = params[:4]
+        dist = list(params[4:])
+    else:
+        return None
+    K = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    return K, np.array(dist or [0, 0, 0, 0], dtype=np.float64)
+
+def _undistorted_camera(fx, fy, cx, cy, dist, width, height):
+    """Return the pinhole camera matrix an undistorted image of this camera maps to"""
+    import cv2
+    K = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    new_K, _ = cv2.getOptimalNewCameraMatrix(K, np.array(dist, dtype=np.float64), (width, height), 0)
+    return new_K
+
+# A full-resolution map pair is ~72 MB at 12 MP, and COLMAP creates one camera per
+# image by default, so only a few are kept: enough for shared-camera datasets
+@functools.lru_cache(maxsize=4)
+def _undistortion_maps(fx, fy, cx, cy, dist, width, height):
+    """Build the undistortion maps of one camera, cached by intrinsics"""
+    import cv2
+    K = np.array([[fx, 0, cx], [0, fy, cy], [0, 0, 1]], dtype=np.float64)
+    new_K = _undistorted_camera(fx, fy, cx, cy, dist, width, height)
+    # Fixed-point CV_16SC2 maps take OpenCV's fastest remap path
+    return cv2.initUndistortRectifyMap(K, np.array(dist, dtype=np.float64), None, new_K,
+                                       (width, height), cv2.CV_16SC2)
+
+def _fast_copy(src, dst):
+    """Copy a file in the kernel with sendfile, keeping its timestamps"""
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            while remaining > 0:
+                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+    except (AttributeError, OSError):
+        # No os.sendfile on Windows, and macOS only sends to sockets (ENOTSOCK)
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+def _undistort_with_opencv(images_folder, model_folder, dense_folder, reconstruction=None):
+    """Undistort images into a COLMAP dense workspace with OpenCV (False if not possible)"""
+    try:
+        import cv2
+    except ImportError:
+        print(f"[COLMAP][WARNING] OpenCV is not installed, cannot undistort images without COLMAP")
+        return False
+    
+    # Reuse the model the mapper left in memory instead of parsing sparse/0 again
+    cameras = images = None
+    if reconstruction is not None:
+        try:
+            cameras, images = _model_from_reconstruction(reconstruction)
+        except AttributeError:
+            cameras = images = None
+    if cameras is None:
+        try:
+            cameras = _read_cameras_bin(os.path.join(model_folder, "cameras.bin"))
+            images = _read_image_cameras_bin(os.path.join(model_folder, "images.bin"))
+        except (OSError, KeyError, struct.error) as e:
+            print(f"[COLMAP][WARNING] Could not read sparse model for OpenCV undistortion: {e}")
+            return False
+    
+    # Each camera's map key; the maps themselves are built on demand by the workers
+    maps = {}
+    pinhole_cameras = {}
+    for camera_id, (model_id, width, height, params) in cameras.items():
+        intrinsics = _opencv_intrinsics(model_id, params)
+        if intrinsics is None:
+            print(f"[COLMAP][WARNING] Camera model {model_id} is not supported by the OpenCV fallback")
+            return False
+        K, dist = intrinsics
+        # Images of distortion-free cameras are already undistorted, copy them as-is
+        if not np.any(dist):
+            maps[camera_id] = None
+            pinhole_cameras[camera_id] = (_PINHOLE_MODEL_ID, width, height,
+                                          (K[0, 0], K[1, 1], K[0, 2], K[1, 2]))
+            continue
+        maps[camera_id] = (K[0, 0], K[1, 1], K[0, 2], K[1, 2], tuple(dist), int(width), int(height))
+        new_K = _undistorted_camera(*maps[camera_id])
+        pinhole_cameras[camera_id] = (_PINHOLE_MODEL_ID, width, height,
+                                      (new_K[0, 0], new_K[1, 1], new_K[0, 2], new_K[1, 2]))
+    
+    def undistort(name, camera_id):
+        output_path = os.path.join(dense_folder, "images", name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if maps[camera_id] is None:
+            _fast_copy(os.path.join(images_folder, name), output_path)
+            return
+        image = cv2.imread(os.path.join(images_folder, name), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise OSError(f"Could not read image {name}")
+        map1, map2 = _undistortion_maps(*maps[camera_id])
+        if not cv2.imwrite(output_path, cv2.remap(image, map1, map2, cv2.INTER_LINEAR)):
+            raise OSError(f"Could not write image {output_path}")
+    
+    print(f"[COLMAP] Undistorting {len(images)} images with OpenCV")
+    # cv2.remap, the image codecs and sendfile release the GIL, so threads scale;
+    # extra workers keep the disk busy while others wait on copies
+    try:
+        with ThreadPoolExecutor(max_workers=multiprocessing.cpu_count() * 2) as executor:
+            futures = [executor.submit(undistort, name, camera_id) for name, camera_id in images]
+            for future in futures:
+                future.result()
+    finally:
+        # Release the cached maps once the workspace is written
+        _undistortion_maps.cache_clear()
+    
+    # Lay out the workspace like image_undistorter: a PINHOLE model and stereo configs
+    sparse_output = os.path.join(dense_folder, "sparse")
+    os.makedirs(sparse_output, exist_ok=True)
+    _write_cameras_bin(os.path.join(sparse_output, "cameras.bin"), pinhole_cameras)
+    for name in ("images.bin", "points3D.bin"):
+        shutil.copyfile(os.path.join(model_folder, name), os.path.join(sparse_output, name))
+    
+    stereo_folder = os.path.join(dense_folder, "stereo")
+    for name in ("depth_maps", "normal_maps", "consistency_graphs"):
+        os.makedirs(os.path.join(stereo_folder, name), exist_ok=True)
+    with open(os.path.join(stereo_folder, "patch-match.cfg"), 'w') as f:
+        f.writelines(f"{name}\n__auto__, 20\n" for name, _ in images)
+    with open(os.path.join(stereo_folder, "fusion.cfg"), 'w') as f:
+        f.writelines(f"{name}\n" for name, _ in images)
+    return True
+
+def image_undistortion(images_folder, sparse_folder, dense_folder, reconstruction=None):
     """Undistort images for dense reconstruction with basic settings"""
+    model_folder = _first_reconstruction(sparse_folder)
+    if model_folder is None:
+        print(f"[COLMAP][ERROR] No reconstruction found in {sparse_folder}")
+        sys.exit(1)
     os.makedirs(dense_folder, exist_ok=True)
+    
+    sentinel_path = os.path.join(dense_folder, ".undistort.done")
+    signature = _stage_signature(os.path.join(model_folder, "images.bin"), [images_folder, model_folder])
+    if _stage_done(sentinel_path, signature) and os.path.isdir(os.path.join(dense_folder, "sparse")):
+        print(f"[COLMAP] Undistorted images are up to date, skipping undistortion")
+        return
+    
     # Use config for COLMAP path
     colmap_cmd = config.colmap_path or "colmap"
     
@@ -58,10 +664,34 @@ def image_undistortion(images_folder, sparse_folder, dense_folder):
     cmd = [
         colmap_cmd, "image_undistorter",
         "--image_path", images_folder,
-        "--input_path", os.path.join(sparse_folder, "0"),
+        "--input_path", model_folder,
         "--output_path", dense_folder,
         "--output_type", "COLMAP"
     ]
     
-    run_cmd(cmd)
-    print(f"[COLMAP] Image undistortion completed") 
\ No newline at end of file
+    # Without a COLMAP binary go straight to OpenCV instead of failing to spawn it
+    if shutil.which(colmap_cmd) is None:
+        print(f"[COLMAP] COLMAP executable not found ({colmap_cmd}), undistorting with OpenCV")
+        if not _undistort_with_opencv(images_folder, model_folder, dense_folder, reconstruction):
+            sys.exit(1)
+    else:
+        proc = run_cmd(cmd, log_path=os.path.join(dense_folder, "image_undistorter.log"), on_error='return')
+        if proc.returncode != 0:
+            # Still deliver undistorted images when the COLMAP undistorter fails
+            print(f"[COLMAP] Falling back to OpenCV undistortion")
+            if not _undistort_with_opencv(images_folder, model_folder, dense_folder, reconstruction):
+                sys.exit(proc.returncode)
+    _mark_stage_done(sentinel_path, signature)
+    print(f"[COLMAP] Image undistortion completed")
+
+def convert_and_undistort(images_folder, sparse_folder, dense_folder, reconstruction=None):
+    """Run model conversion and image undistortion concurrently"""
+    # Both stages only read sparse/0 and write to different folders, so the TXT
+    # export can overlap with the I/O-bound undistortion
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(model_conversion, sparse_folder, reconstruction),
+            executor.submit(image_undistortion, images_folder, sparse_folder, dense_folder, reconstruction)
+        ]
+        for future in futures:
+            future.result()
@@ -5,8 +5,55 @@ import os
 import numpy as np
 import open3d as o3d
 import pandas as pd
+from scipy.spatial import cKDTree
 from config import config
 
+# Numba is optional: it fuses the distance statistics into one parallel pass
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    # No 'ninf' in the fast-math flags, the min/max reductions start from +/-inf
+    @numba.njit(parallel=True, fastmath={'reassoc', 'contract', 'arcp'}, cache=True)
+    def _distance_reductions(distances):
+        """Return (sum, sum of squares, min, max) of the distances"""
+        total = 0.0
+        squared_total = 0.0
+        minimum = np.inf
+        maximum = -np.inf
+        for i in numba.prange(distances.shape[0]):
+            d = distances[i]
+            total += d
+            squared_total += d * d
+            minimum = min(minimum, d)
+            maximum = max(maximum, d)
+        return total, squared_total, minimum, maximum
+
+def _distance_stats(distances):
+    """Return mean, std, min, max, median and RMS of the distances"""
+    count = len(distances)
+    if numba is not None:
+        total, squared_total, minimum, maximum = _distance_reductions(
+            np.ascontiguousarray(distances, dtype=np.float64))
+    else:
+        total = distances.sum()
+        squared_total = np.dot(distances, distances)
+        minimum, maximum = distances.min(), distances.max()
+    
+    # Mean, std and RMS all follow from the sum and the sum of squares
+    mean = total / count
+    mean_square = squared_total / count
+    return {
+        'mean': mean,
+        'std': np.sqrt(max(mean_square - mean * mean, 0.0)),
+        'min': minimum,
+        'max': maximum,
+        'median': np.median(distances),
+        'rms': np.sqrt(mean_square)
+    }
+
 def run_c2c_comparison(mesh1, aligned_mesh2, output_dir):
     """Run Cloud-to-Cloud distance comparison"""
     print("Running C2C distance comparison using custom implementation")
@@ -20,36 +67,16 @@ def run_c2c_comparison(mesh1, aligned_mesh2, output_dir):
         mesh1_pcd = mesh1_o3d.sample_points_uniformly(number_of_points=50000)
         mesh2_pcd = mesh2_o3d.sample_points_uniformly(number_of_points=50000)
         
-        # Compute distances from mesh1 points to mesh2
-        distances_1to2 = []
-        mesh2_tree = o3d.geometry.KDTreeFlann(mesh2_pcd)
-        
-        for point in mesh1_pcd.points:
-            # Find nearest neighbor in mesh2
-            [k, idx, dist] = mesh2_tree.search_knn_vector_3d(point, 1)
-            distances_1to2.append(np.sqrt(dist[0]))
-        
-        # Compute distances from mesh2 points to mesh1
-        distances_2to1 = []
-        mesh1_tree = o3d.geometry.KDTreeFlann(mesh1_pcd)
-        
-        for point in mesh2_pcd.points:
-            # Find nearest neighbor in mesh1
-            [k, idx, dist] = mesh1_tree.search_knn_vector_3d(point, 1)
-            distances_2to1.append(np.sqrt(dist[0]))
+        # Nearest-neighbour distances in both directions, computed by Open3D's
+        # parallel C++ kd-tree search straight on the sampled clouds
+        distances_1to2 = np.asarray(mesh1_pcd.compute_point_cloud_distance(mesh2_pcd))
+        distances_2to1 = np.asarray(mesh2_pcd.compute_point_cloud_distance(mesh1_pcd))
         
         # Combine all distances
-        all_distances = np.array(distances_1to2 + distances_2to1)
+        all_distances = np.concatenate([distances_1to2, distances_2to1])
         
         # Calculate statistics
-        stats = {
-            'mean': np.mean(all_distances),
-            'std': np.std(all_distances),
-            'min': np.min(all_distances),
-            'max': np.max(all_distances),
-            'median': np.median(all_distances),
-            'rms': np.sqrt(np.mean(all_distances**2))
-        }
+        stats = _distance_stats(all_distances)
         
         # Create CSV with distance data
         c2c_csv = os.path.join(output_dir, "custom_c2c_distances.csv")
@@ -58,6 +85,8 @@ def run_c2c_comparison(mesh1, aligned_mesh2, output_dir):
             'source': ['mesh1_to_mesh2'] * len(distances_1to2) + ['mesh2_to_mesh1'] * len(distances_2to1)
         })
         distance_df.to_csv(c2c_csv, index=False)
+        # Binary copy of the distance column for the report histograms (no CSV parse)
+        np.save(os.path.splitext(c2c_csv)[0] + '.npy', all_distances.astype(np.float32))
         
         # Create statistics CSV
         stats_csv = os.path.join(output_dir, "custom_c2c_statistics.csv")
@@ -118,39 +147,20 @@ def run_c2m_comparison(mesh1, aligned_mesh2, output_dir):
         # Sample points from mesh2 (the "cloud")
         mesh2_pcd = mesh2_o3d.sample_points_uniformly(number_of_points=50000)
         
-        # Compute signed distances from mesh2 points to mesh1
-        distances = []
-        
-        # Convert vertices to numpy array for easier processing
-        mesh1_vertices = np.array(mesh1_o3d.vertices)
-        
-        for point in mesh2_pcd.points:
-            # Find nearest neighbor in mesh1 using simple distance calculation
-            point_array = np.array(point)
-            distances_to_vertices = np.linalg.norm(mesh1_vertices - point_array, axis=1)
-            nearest_idx = np.argmin(distances_to_vertices)
-            nearest_vertex = mesh1_vertices[nearest_idx]
-            
-            # Calculate distance
-            distance = distances_to_vertices[nearest_idx]
-            
-            # Simple heuristic for sign: if point is "outside" the mesh bounds, positive
-            # This is approximate - more sophisticated methods could be implemented
-            if np.any(point_array > np.max(mesh1_vertices, axis=0)) or np.any(point_array < np.min(mesh1_vertices, axis=0)):
-                distances.append(distance)
-            else:
-                distances.append(-distance)
-        
-        distances = np.array(distances)
+        # Compute signed distances from mesh2 points to the nearest mesh1 vertex
+        mesh1_vertices = np.asarray(mesh1_o3d.vertices)
+        points = np.asarray(mesh2_pcd.points)
+        distances, _ = cKDTree(mesh1_vertices).query(points, k=1, workers=-1)
+        
+        # Simple heuristic for sign: if point is "outside" the mesh bounds, positive
+        # This is approximate - more sophisticated methods could be implemented
+        outside = (np.any(points > mesh1_vertices.max(axis=0), axis=1) |
+                   np.any(points < mesh1_vertices.min(axis=0), axis=1))
+        distances = np.where(outside, distances, -distances)
         
         # Calculate statistics
         stats = {
-            'mean': np.mean(distances),
-            'std': np.std(distances),
-            'min': np.min(distances),
-            'max': np.max(distances),
-            'median': np.median(distances),
-            'rms': np.sqrt(np.mean(distances**2)),
+            **_distance_stats(distances),
             'positive_count': np.sum(distances > 0),
             'negative_count': np.sum(distances < 0),
             'zero_count': np.sum(distances == 0)
@@ -163,6 +173,8 @@ def run_c2m_comparison(mesh1, aligned_mesh2, output_dir):
             'absolute_distance': np.abs(distances)
         })
         distance_df.to_csv(c2m_csv, index=False)
+        # Binary copy of the signed distance column for the report histograms
+        np.save(os.path.splitext(c2m_csv)[0] + '.npy', distances.astype(np.float32))
         
         # Create statistics CSV
         stats_csv = os.path.join(output_dir, "custom_c2m_statistics.csv")
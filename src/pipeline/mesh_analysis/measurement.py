@@ -2,10 +2,17 @@
 Custom Mesh Measurement Module
 """
 import os
+import csv
 import numpy as np
 import open3d as o3d
 from config import config
 
+# Numba is optional: it fuses the area kernel into one parallel pass without temporaries
+try:
+    import numba
+except ImportError:
+    numba = None
+
 def run_mesh_measurement(mesh_path, output_dir, mesh_name):
     """Measure area and volume of a mesh"""
     print(f"Measuring {mesh_name} using custom implementation")
@@ -18,27 +25,26 @@ def run_mesh_measurement(mesh_path, output_dir, mesh_name):
         if not mesh.has_vertices() or not mesh.has_triangles():
             raise ValueError("Invalid mesh: no vertices or triangles")
         
-        # Calculate surface area
-        surface_area = mesh.get_surface_area()
+        # Check if mesh is watertight (closed)
+        is_watertight = mesh.is_watertight()
         
-        # Calculate volume (requires watertight mesh)
-        volume = mesh.get_volume()
+        # Calculate surface area, volume and triangle area statistics in one pass; the
+        # signed-tetrahedra volume is exact for closed meshes and an estimate otherwise
+        surface_area, volume, area_min, area_max, area_mean, area_std = _area_volume_stats(mesh)
+        volume_note = "" if is_watertight else " (estimate, mesh is not watertight)"
         
         # Calculate additional metrics
         vertex_count = len(mesh.vertices)
         triangle_count = len(mesh.triangles)
         
-        # Calculate bounding box dimensions
-        bbox = mesh.get_axis_aligned_bounding_box()
-        bbox_extent = bbox.get_extent()
-        bbox_volume = bbox_extent[0] * bbox_extent[1] * bbox_extent[2]
+        # Calculate bounding box dimensions straight from the vertex view
+        vertices, _ = _mesh_arrays(mesh)
+        bbox_extent = vertices.max(axis=0) - vertices.min(axis=0)
+        bbox_volume = float(bbox_extent.prod())
         
         # Calculate mesh density (triangles per unit volume)
         mesh_density = triangle_count / bbox_volume if bbox_volume > 0 else 0
         
-        # Check if mesh is watertight (closed)
-        is_watertight = mesh.is_watertight()
-        
         # Create measurement file
         measure_file = os.path.join(output_dir, f"{mesh_name}_measure.txt")
         
@@ -51,7 +57,7 @@ def run_mesh_measurement(mesh_path, output_dir, mesh_name):
             f.write("GEOMETRIC PROPERTIES:\n")
             f.write("-" * 20 + "\n")
             f.write(f"Surface Area: {surface_area:.6f} square units\n")
-            f.write(f"Volume: {volume:.6f} cubic units\n")
+            f.write(f"Volume: {volume:.6f} cubic units{volume_note}\n")
             f.write(f"Vertex Count: {vertex_count:,}\n")
             f.write(f"Triangle Count: {triangle_count:,}\n\n")
             
@@ -70,33 +76,32 @@ def run_mesh_measurement(mesh_path, output_dir, mesh_name):
             
             # Calculate triangle quality metrics
             if triangle_count > 0:
-                areas = _calculate_triangle_areas(mesh)
                 f.write(f"Triangle Area Statistics:\n")
-                f.write(f"  - Min: {np.min(areas):.6f}\n")
-                f.write(f"  - Max: {np.max(areas):.6f}\n")
-                f.write(f"  - Mean: {np.mean(areas):.6f}\n")
-                f.write(f"  - Std Dev: {np.std(areas):.6f}\n")
+                f.write(f"  - Min: {area_min:.6f}\n")
+                f.write(f"  - Max: {area_max:.6f}\n")
+                f.write(f"  - Mean: {area_mean:.6f}\n")
+                f.write(f"  - Std Dev: {area_std:.6f}\n")
         
         # Create CSV with detailed measurements
         csv_file = os.path.join(output_dir, f"{mesh_name}_measurements.csv")
-        import pandas as pd
-        
-        measurements_df = pd.DataFrame({
-            'metric': ['surface_area', 'volume', 'vertex_count', 'triangle_count', 
-                      'bbox_width', 'bbox_height', 'bbox_depth', 'bbox_volume', 
-                      'mesh_density', 'is_watertight'],
-            'value': [surface_area, volume, vertex_count, triangle_count,
-                     bbox_extent[0], bbox_extent[1], bbox_extent[2], bbox_volume,
-                     mesh_density, is_watertight],
-            'unit': ['square_units', 'cubic_units', 'count', 'count',
-                    'units', 'units', 'units', 'cubic_units',
-                    'triangles_per_cubic_unit', 'boolean']
-        })
-        measurements_df.to_csv(csv_file, index=False)
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['metric', 'value', 'unit'])
+            writer.writerows(zip(
+                ['surface_area', 'volume', 'vertex_count', 'triangle_count',
+                 'bbox_width', 'bbox_height', 'bbox_depth', 'bbox_volume',
+                 'mesh_density', 'is_watertight'],
+                [surface_area, volume, vertex_count, triangle_count,
+                 bbox_extent[0], bbox_extent[1], bbox_extent[2], bbox_volume,
+                 mesh_density, is_watertight],
+                ['square_units', 'cubic_units', 'count', 'count',
+                 'units', 'units', 'units', 'cubic_units',
+                 'triangles_per_cubic_unit', 'boolean']
+            ))
         
         print(f"{mesh_name} measurement completed successfully")
         print(f"  - Surface Area: {surface_area:.6f} square units")
-        print(f"  - Volume: {volume:.6f} cubic units")
+        print(f"  - Volume: {volume:.6f} cubic units{volume_note}")
         print(f"  - Vertices: {vertex_count:,}")
         print(f"  - Triangles: {triangle_count:,}")
         print(f"  - Watertight: {'Yes' if is_watertight else 'No'}")
@@ -119,23 +124,69 @@ def run_mesh_measurement(mesh_path, output_dir, mesh_name):
         
         return error_file
 
-def _calculate_triangle_areas(mesh):
-    """Calculate areas of all triangles in the mesh"""
-    areas = []
-    vertices = np.array(mesh.vertices)
-    triangles = np.array(mesh.triangles)
+if numba is not None:
+    # No 'ninf' in the fast-math flags, the min/max reductions start from +/-inf
+    @numba.njit(parallel=True, fastmath={'reassoc', 'contract', 'arcp'}, cache=True)
+    def _area_volume_reductions(vertices, triangles):
+        """Return (area sum, area sum of squares, min, max, signed volume x6) of the triangles"""
+        area_sum = 0.0
+        area_sq_sum = 0.0
+        area_min = np.inf
+        area_max = -np.inf
+        volume6 = 0.0
+        for i in numba.prange(triangles.shape[0]):
+            a, b, c = triangles[i, 0], triangles[i, 1], triangles[i, 2]
+            ex = vertices[b, 0] - vertices[a, 0]
+            ey = vertices[b, 1] - vertices[a, 1]
+            ez = vertices[b, 2] - vertices[a, 2]
+            fx = vertices[c, 0] - vertices[a, 0]
+            fy = vertices[c, 1] - vertices[a, 1]
+            fz = vertices[c, 2] - vertices[a, 2]
+            cx = ey * fz - ez * fy
+            cy = ez * fx - ex * fz
+            cz = ex * fy - ey * fx
+            squared = cx * cx + cy * cy + cz * cz
+            area = 0.5 * np.sqrt(squared)
+            area_sum += area
+            area_sq_sum += 0.25 * squared
+            area_min = min(area_min, area)
+            area_max = max(area_max, area)
+            # Signed volume of the tetrahedron (origin, a, b, c), reusing the cross product
+            volume6 += vertices[a, 0] * cx + vertices[a, 1] * cy + vertices[a, 2] * cz
+        return area_sum, area_sq_sum, area_min, area_max, volume6
+
+def _mesh_arrays(mesh):
+    """Return zero-copy (vertices, triangles) NumPy views of a legacy or tensor Open3D mesh"""
+    if isinstance(mesh, o3d.t.geometry.TriangleMesh):
+        return mesh.vertex.positions.numpy(), mesh.triangle.indices.numpy()
+    # np.asarray wraps the Vector3dVector/Vector3iVector buffers, np.array would copy them
+    return np.asarray(mesh.vertices), np.asarray(mesh.triangles)
+
+def _area_volume_stats(mesh, chunk_size=262144):
+    """Return (surface area, volume, min, max, mean, std of triangle areas) of the mesh"""
+    vertices, triangles = _mesh_arrays(mesh)
+    triangle_count = len(triangles)
     
-    for triangle in triangles:
-        # Get triangle vertices
-        v1 = vertices[triangle[0]]
-        v2 = vertices[triangle[1]]
-        v3 = vertices[triangle[2]]
-        
-        # Calculate triangle area using cross product
-        edge1 = v2 - v1
-        edge2 = v3 - v1
-        cross_product = np.cross(edge1, edge2)
-        area = 0.5 * np.linalg.norm(cross_product)
-        areas.append(area)
+    if numba is not None:
+        area_sum, area_sq_sum, area_min, area_max, volume6 = _area_volume_reductions(
+            np.ascontiguousarray(vertices), np.ascontiguousarray(triangles))
+    else:
+        # Reduce block by block so only one chunk of areas is alive at a time
+        area_sum = area_sq_sum = volume6 = 0.0
+        area_min, area_max = np.inf, -np.inf
+        for start in range(0, triangle_count, chunk_size):
+            corners = vertices[triangles[start:start + chunk_size]]
+            cross_products = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            squared = np.einsum('ij,ij->i', cross_products, cross_products)
+            areas = 0.5 * np.sqrt(squared)
+            area_sum += areas.sum()
+            area_sq_sum += 0.25 * squared.sum()
+            area_min = min(area_min, areas.min())
+            area_max = max(area_max, areas.max())
+            # Signed tetrahedra (divergence theorem): sum of a . ((b - a) x (c - a))
+            volume6 += np.einsum('ij,ij->', corners[:, 0], cross_products)
     
-    return np.array(areas) 
\ No newline at end of file
+    mean = area_sum / triangle_count
+    std = np.sqrt(max(area_sq_sum / triangle_count - mean * mean, 0.0))
+    # Absolute value like Open3D's get_volume, independent of the winding order
+    return area_sum, abs(volume6) / 6.0, area_min, area_max, mean, std
@@ -17,34 +17,48 @@ from pipeline.mesh_analysis.alignment import run_icp_alignment
 from pipeline.mesh_analysis.comparison import run_c2c_comparison, run_c2m_comparison
 from pipeline.mesh_analysis.measurement import run_mesh_measurement
 
+# Unit cube shared by the test meshes
+_CUBE_VERTICES_F64 = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],  # bottom face
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]   # top face
+], dtype=np.float64)
+
+_CUBE_TRIS_I32 = np.array([
+    [0, 1, 2], [0, 2, 3],  # bottom face
+    [4, 7, 6], [4, 6, 5],  # top face
+    [0, 4, 5], [0, 5, 1],  # front face
+    [1, 5, 6], [1, 6, 2],  # right face
+    [2, 6, 7], [2, 7, 3],  # back face
+    [3, 7, 4], [3, 4, 0]   # left face
+], dtype=np.int32)
+
+def _write_cube_mesh(output_path, vertices):
+    """Write the cube triangles with the given vertices to a mesh file"""
+    # Tensor mesh over zero-copy views of the arrays, no Vector3dVector conversion
+    mesh = o3d.t.geometry.TriangleMesh()
+    mesh.vertex.positions = o3d.core.Tensor.from_numpy(vertices)
+    mesh.triangle.indices = o3d.core.Tensor.from_numpy(_CUBE_TRIS_I32)
+    o3d.t.io.write_triangle_mesh(output_path, mesh, write_ascii=True)
+
+def _report_expected_files(temp_dir, expected_files):
+    """Print whether each expected output file was created in temp_dir"""
+    # One directory listing instead of a stat per expected file
+    present = {entry.name for entry in os.scandir(temp_dir)}
+    for file_name in expected_files:
+        if file_name in present:
+            print(f"✓ {file_name} created successfully")
+        else:
+            print(f"✗ {file_name} not found")
+
 def create_test_mesh(output_path, name="test_mesh"):
     """Create a simple test mesh for testing"""
     print(f"Creating test mesh: {name}")
     
-    # Create a simple cube mesh
-    vertices = np.array([
-        [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],  # bottom face
-        [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]   # top face
-    ], dtype=np.float32)
-    
-    triangles = np.array([
-        [0, 1, 2], [0, 2, 3],  # bottom face
-        [4, 7, 6], [4, 6, 5],  # top face
-        [0, 4, 5], [0, 5, 1],  # front face
-        [1, 5, 6], [1, 6, 2],  # right face
-        [2, 6, 7], [2, 7, 3],  # back face
-        [3, 7, 4], [3, 4, 0]   # left face
-    ], dtype=np.int32)
-    
-    mesh = o3d.geometry.TriangleMesh()
-    mesh.vertices = o3d.utility.Vector3dVector(vertices)
-    mesh.triangles = o3d.utility.Vector3iVector(triangles)
-    
-    # Save mesh
-    o3d.io.write_triangle_mesh(output_path, mesh)
+    # Create a simple cube mesh and save it
+    _write_cube_mesh(output_path, _CUBE_VERTICES_F64)
     print(f"  - Saved to: {output_path}")
-    print(f"  - Vertices: {len(vertices)}")
-    print(f"  - Triangles: {len(triangles)}")
+    print(f"  - Vertices: {len(_CUBE_VERTICES_F64)}")
+    print(f"  - Triangles: {len(_CUBE_TRIS_I32)}")
     
     return output_path
 
@@ -52,31 +66,12 @@ def create_offset_mesh(output_path, offset=0.1, name="offset_mesh"):
     """Create a test mesh with slight offset for testing alignment"""
     print(f"Creating offset test mesh: {name}")
     
-    # Create a simple cube mesh with offset
-    vertices = np.array([
-        [offset, offset, offset], [1+offset, offset, offset], [1+offset, 1+offset, offset], [offset, 1+offset, offset],  # bottom face
-        [offset, offset, 1+offset], [1+offset, offset, 1+offset], [1+offset, 1+offset, 1+offset], [offset, 1+offset, 1+offset]   # top face
-    ], dtype=np.float32)
-    
-    triangles = np.array([
-        [0, 1, 2], [0, 2, 3],  # bottom face
-        [4, 7, 6], [4, 6, 5],  # top face
-        [0, 4, 5], [0, 5, 1],  # front face
-        [1, 5, 6], [1, 6, 2],  # right face
-        [2, 6, 7], [2, 7, 3],  # back face
-        [3, 7, 4], [3, 4, 0]   # left face
-    ], dtype=np.int32)
-    
-    mesh = o3d.geometry.TriangleMesh()
-    mesh.vertices = o3d.utility.Vector3dVector(vertices)
-    mesh.triangles = o3d.utility.Vector3iVector(triangles)
-    
-    # Save mesh
-    o3d.io.write_triangle_mesh(output_path, mesh)
+    # Create a simple cube mesh with offset and save it
+    _write_cube_mesh(output_path, _CUBE_VERTICES_F64 + offset)
     print(f"  - Saved to: {output_path}")
     print(f"  - Offset: {offset}")
-    print(f"  - Vertices: {len(vertices)}")
-    print(f"  - Triangles: {len(triangles)}")
+    print(f"  - Vertices: {len(_CUBE_VERTICES_F64)}")
+    print(f"  - Triangles: {len(_CUBE_TRIS_I32)}")
     
     return output_path
 
@@ -100,12 +95,7 @@ def test_mesh_measurement():
             "test_cube_measurements.csv"
         ]
         
-        for file_name in expected_files:
-            file_path = os.path.join(temp_dir, file_name)
-            if os.path.exists(file_path):
-                print(f"✓ {file_name} created successfully")
-            else:
-                print(f"✗ {file_name} not found")
+        _report_expected_files(temp_dir, expected_files)
 
 def test_icp_alignment():
     """Test ICP alignment functionality"""
@@ -128,12 +118,7 @@ def test_icp_alignment():
             "icp_transformation.txt"
         ]
         
-        for file_name in expected_files:
-            file_path = os.path.join(temp_dir, file_name)
-            if os.path.exists(file_path):
-                print(f"✓ {file_name} created successfully")
-            else:
-                print(f"✗ {file_name} not found")
+        _report_expected_files(temp_dir, expected_files)
 
 def test_c2c_comparison():
     """Test Cloud-to-Cloud comparison functionality"""
@@ -160,12 +145,7 @@ def test_c2c_comparison():
             "custom_c2c_report.txt"
         ]
         
-        for file_name in expected_files:
-            file_path = os.path.join(temp_dir, file_name)
-            if os.path.exists(file_path):
-                print(f"✓ {file_name} created successfully")
-            else:
-                print(f"✗ {file_name} not found")
+        _report_expected_files(temp_dir, expected_files)
 
 def test_c2m_comparison():
     """Test Cloud-to-Mesh comparison functionality"""
@@ -192,12 +172,7 @@ def test_c2m_comparison():
             "custom_c2m_report.txt"
         ]
         
-        for file_name in expected_files:
-            file_path = os.path.join(temp_dir, file_name)
-            if os.path.exists(file_path):
-                print(f"✓ {file_name} created successfully")
-            else:
-                print(f"✗ {file_name} not found")
+        _report_expected_files(temp_dir, expected_files)
 
 def main():
     """Run all tests"""
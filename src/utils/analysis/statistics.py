@@ -2,32 +2,44 @@
 Statistics Analysis Module
 """
 import os
+import re
+import functools
+
+# One sweep over the whole report instead of several substring tests per line.
+# Labels are matched case-insensitively at the start of a line, so both "Mean: x"
+# and the comparison reports' "MEAN: x" are found, and "Bounding Box Volume"
+# no longer overrides "Volume"
+_NUMBER = r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+_STATISTIC_PATTERN = re.compile(r'^\s*(Mean|Std|Min|Max|RMS)\b[^:\n]*:\s*' + _NUMBER, re.I | re.M)
+_MEASURE_PATTERN = re.compile(r'^\s*(Surface area|Volume)\s*:\s*' + _NUMBER, re.I | re.M)
+_STATISTIC_KEYS = {'mean': 'mean', 'std': 'stddev', 'min': 'min', 'max': 'max', 'rms': 'rms'}
+
+def _file_key(path):
+    """Return the (path, mtime, size) key a parsed file is cached under"""
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+@functools.lru_cache(maxsize=64)
+def _parse_statistics(log_file, mtime_ns, size):
+    """Parse a statistics report, cached until the file changes"""
+    with open(log_file, 'r') as f:
+        data = f.read()
+    return {_STATISTIC_KEYS[label.lower()]: float(value)
+            for label, value in _STATISTIC_PATTERN.findall(data)}
+
+@functools.lru_cache(maxsize=64)
+def _parse_mesh_measure(measure_file, mtime_ns, size):
+    """Parse a mesh measurement report, cached until the file changes"""
+    with open(measure_file, 'r') as f:
+        data = f.read()
+    values = {label.lower(): float(value) for label, value in _MEASURE_PATTERN.findall(data)}
+    return values.get('surface area'), values.get('volume')
 
 def parse_statistics(log_file):
     """Parse statistics from custom 3D mesh analysis log files"""
-    stats = {}
-    with open(log_file, 'r') as f:
-        for line in f:
-            if 'Mean' in line:
-                stats['mean'] = float(line.split(':')[-1].strip().split()[0])
-            elif 'Std. dev.' in line:
-                stats['stddev'] = float(line.split(':')[-1].strip().split()[0])
-            elif 'Min dist.' in line or 'Min distance' in line:
-                stats['min'] = float(line.split(':')[-1].strip().split()[0])
-            elif 'Max dist.' in line or 'Max distance' in line:
-                stats['max'] = float(line.split(':')[-1].strip().split()[0])
-            elif 'RMS' in line:
-                stats['rms'] = float(line.split(':')[-1].strip().split()[0])
-    return stats
+    # Copy so callers cannot alter the cached result
+    return dict(_parse_statistics(*_file_key(log_file)))
 
 def parse_mesh_measure(measure_file):
     """Parse area and volume from mesh measurement files"""
-    area = None
-    volume = None
-    with open(measure_file, 'r') as f:
-        for line in f:
-            if 'Surface' in line and 'area' in line:
-                area = float(line.split(':')[-1].strip().split()[0])
-            elif 'Volume' in line:
-                volume = float(line.split(':')[-1].strip().split()[0])
-    return area, volume 
\ No newline at end of file
+    return _parse_mesh_measure(*_file_key(measure_file))
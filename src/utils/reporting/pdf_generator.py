@@ -2,25 +2,47 @@
 PDF Report Generator Module
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
 from ..analysis.statistics import parse_statistics, parse_mesh_measure
 from ..analysis.visualization import plot_histogram
 
-def generate_pdf_report(run_dir):
+# Images are embedded 100 mm wide; histograms are rendered at exactly that size
+_IMAGE_WIDTH_MM = 100
+_HISTOGRAM_DPI = 150
+_HISTOGRAM_FIGSIZE = (_IMAGE_WIDTH_MM / 25.4, _IMAGE_WIDTH_MM / 50.8)
+
+# Move to the start of the next line after a cell
+_NEXT_LINE = {'new_x': XPos.LMARGIN, 'new_y': YPos.NEXT}
+
+def _is_up_to_date(output_path, input_path):
+    """Return True if output_path exists and is newer than input_path"""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(input_path).st_mtime_ns
+    except OSError:
+        return False
+
+def _pdf_text(text):
+    """Make text encodable by the PDF core fonts, which only cover Latin-1"""
+    return text.replace('Δ', 'delta').encode('latin-1', 'replace').decode('latin-1')
+
+def generate_pdf_report(run_dir, c2c_stats=None, c2m_stats=None, mesh1=None, mesh2=None):
     """Generate a PDF report with summary, images, tables, and plots"""
     pdf = FPDF()
     pdf.add_page()
-    pdf.set_font("Arial", size=14)
-    pdf.cell(0, 10, f"3D Comparison Report: {os.path.basename(run_dir)}", ln=True, align='C')
-    pdf.set_font("Arial", size=10)
+    pdf.set_font("Helvetica", size=14)
+    pdf.cell(0, 10, f"3D Comparison Report: {os.path.basename(run_dir)}", **_NEXT_LINE, align='C')
+    pdf.set_font("Helvetica", size=10)
     pdf.ln(5)
     
     # Add summary text
     summary_path = os.path.join(run_dir, 'summary.txt')
     if os.path.exists(summary_path):
+        # One multi_cell for the whole summary instead of one per line
         with open(summary_path, 'r') as f:
-            for line in f:
-                pdf.multi_cell(0, 8, line.strip())
+            summary_text = '\n'.join(line.strip() for line in f)
+        pdf.multi_cell(0, 8, _pdf_text(summary_text), **_NEXT_LINE)
         pdf.ln(5)
     
     # Add screenshots
@@ -28,42 +50,60 @@ def generate_pdf_report(run_dir):
                         ("C2M Screenshot", 'custom_c2m_visualization.png')]:
         img_path = os.path.join(run_dir, fname)
         if os.path.exists(img_path):
-            pdf.set_font("Arial", size=11)
-            pdf.cell(0, 8, label, ln=True)
-            pdf.image(img_path, w=100)
+            pdf.set_font("Helvetica", size=11)
+            pdf.cell(0, 8, label, **_NEXT_LINE)
+            pdf.image(img_path, w=_IMAGE_WIDTH_MM)
             pdf.ln(5)
     
     # Add statistics tables
-    pdf.set_font("Arial", size=11)
-    pdf.cell(0, 8, "Key Statistics:", ln=True)
-    c2c_stats = parse_statistics(os.path.join(run_dir, 'custom_c2c_report.txt'))
-    c2m_stats = parse_statistics(os.path.join(run_dir, 'custom_c2m_report.txt'))
-    mesh1_area, mesh1_volume = parse_mesh_measure(os.path.join(run_dir, 'mesh1_measure.txt'))
-    mesh2_area, mesh2_volume = parse_mesh_measure(os.path.join(run_dir, 'mesh2_measure.txt'))
+    pdf.set_font("Helvetica", size=11)
+    pdf.cell(0, 8, "Key Statistics:", **_NEXT_LINE)
+    # Reports already parsed by the caller (summarize_comparison) are not read again
+    if c2c_stats is None:
+        c2c_stats = parse_statistics(os.path.join(run_dir, 'custom_c2c_report.txt'))
+    if c2m_stats is None:
+        c2m_stats = parse_statistics(os.path.join(run_dir, 'custom_c2m_report.txt'))
+    mesh1_area, mesh1_volume = mesh1 or parse_mesh_measure(os.path.join(run_dir, 'mesh1_measure.txt'))
+    mesh2_area, mesh2_volume = mesh2 or parse_mesh_measure(os.path.join(run_dir, 'mesh2_measure.txt'))
     
     def stat_row(label, stats):
         return f"{label}: Mean={stats.get('mean', 'N/A')}, Max={stats.get('max', 'N/A')}, Min={stats.get('min', 'N/A')}, Stddev={stats.get('stddev', 'N/A')}, RMS={stats.get('rms', 'N/A')}"
     
-    pdf.set_font("Arial", size=10)
-    pdf.cell(0, 7, stat_row("C2C", c2c_stats), ln=True)
-    pdf.cell(0, 7, stat_row("C2M", c2m_stats), ln=True)
-    pdf.cell(0, 7, f"Mesh1 area: {mesh1_area} m², volume: {mesh1_volume} m³", ln=True)
-    pdf.cell(0, 7, f"Mesh2 area: {mesh2_area} m², volume: {mesh2_volume} m³", ln=True)
+    pdf.set_font("Helvetica", size=10)
+    pdf.multi_cell(0, 7, _pdf_text('\n'.join([
+        stat_row("C2C", c2c_stats),
+        stat_row("C2M", c2m_stats),
+        f"Mesh1 area: {mesh1_area} m², volume: {mesh1_volume} m³",
+        f"Mesh2 area: {mesh2_area} m², volume: {mesh2_volume} m³"
+    ])), **_NEXT_LINE)
     pdf.ln(5)
     
     # Add histograms
+    histograms = []
     for label, csvname, plotname in [
         ("C2C Distance Histogram", 'custom_c2c_distances.csv', 'c2c_hist.png'),
         ("C2M Distance Histogram", 'custom_c2m_distances.csv', 'c2m_hist.png')]:
         csv_path = os.path.join(run_dir, csvname)
-        plot_path = os.path.join(run_dir, plotname)
         if os.path.exists(csv_path):
-            plot_histogram(csv_path, label, plot_path)
-            if os.path.exists(plot_path):
-                pdf.set_font("Arial", size=11)
-                pdf.cell(0, 8, label, ln=True)
-                pdf.image(plot_path, w=100)
-                pdf.ln(5)
+            histograms.append((label, csv_path, os.path.join(run_dir, plotname)))
+    
+    # The histograms are independent, so render them concurrently (each on its own
+    # Figure); reuse one rendered after the last change to its CSV
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(plot_histogram, csv_path, label, plot_path,
+                                   figsize=_HISTOGRAM_FIGSIZE, dpi=_HISTOGRAM_DPI)
+                   for label, csv_path, plot_path in histograms
+                   if not _is_up_to_date(plot_path, csv_path)]
+        for future in futures:
+            future.result()
+    
+    # FPDF is not thread-safe, embed the images in order afterwards
+    for label, csv_path, plot_path in histograms:
+        if os.path.exists(plot_path):
+            pdf.set_font("Helvetica", size=11)
+            pdf.cell(0, 8, label, **_NEXT_LINE)
+            pdf.image(plot_path, w=_IMAGE_WIDTH_MM)
+            pdf.ln(5)
     
     # Save PDF
     pdf_path = os.path.join(run_dir, 'report.pdf')
@@ -45,5 +45,6 @@ def summarize_comparison(run_dir):
     with open(os.path.join(run_dir, 'summary.txt'), 'w') as f:
         f.write(summary_text)
     
-    # Generate PDF report
-    generate_pdf_report(run_dir) 
\ No newline at end of file
+    # Generate PDF report from the statistics parsed above
+    generate_pdf_report(run_dir, c2c_stats=c2c_stats, c2m_stats=c2m_stats,
+                        mesh1=(mesh1_area, mesh1_volume), mesh2=(mesh2_area, mesh2_volume)) 
\ No newline at end of file